@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import sys
@@ -11,9 +13,32 @@ load_dotenv()
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from app.routes.pages import router as pages_router
-from app.db import init_db
+from app.responses import ORJSONResponse
+from app.db import ping_db, ensure_indexes
+from app.crawler import crawler
 
-app = FastAPI(title="AI Landing Page Builder")
+# Initialize DB once per cold start without blocking on index creation
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await ping_db()
+        app.state.index_task = asyncio.create_task(ensure_indexes())
+    except Exception as e:
+        print(f"Database initialization warning: {e}")
+    yield
+    await crawler.close()
+
+is_production = os.getenv("ENVIRONMENT") == "production"
+
+# No interactive docs or schema generation in production
+app = FastAPI(
+    title="AI Landing Page Builder",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+    openapi_url=None if is_production else "/openapi.json",
+    docs_url=None if is_production else "/docs",
+    redoc_url=None if is_production else "/redoc"
+)
 
 # CORS Configuration
 cors_origins = [
@@ -29,7 +54,7 @@ frontend_url = os.getenv("FRONTEND_URL")
 if frontend_url:
     cors_origins.append(frontend_url)
 
-if os.getenv("ENVIRONMENT") == "production":
+if is_production:
     cors_origins.extend([
         "https://ai-dlp-frontend.vercel.app",
     ])
@@ -38,16 +63,11 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists so preflight responses are not built by echoing request headers
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["content-type", "authorization"],
 )
 
-# Initialize DB (only run once on startup)
-try:
-    init_db()
-except Exception as e:
-    print(f"Database initialization warning: {e}")
-
 # Include routes
 app.include_router(pages_router, prefix="/api", tags=["pages"])
 
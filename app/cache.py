@@ -0,0 +1,66 @@
+# cache.py
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Shared across serverless instances; caching stays in-process only when REDIS_URL is unset
+redis_client = redis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
+
+# In-process fallback when REDIS_URL is unset: key -> (expires_at, value), oldest first
+LOCAL_CACHE_SIZE = 256
+_local_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+def make_key(prefix: str, *parts) -> str:
+    """Build a fixed-length cache key from a prefix and arbitrary key parts"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+async def cache_get(key: str, local: bool = True) -> Optional[str]:
+    """
+    Read a cached value, treating Redis errors as a miss
+    
+    Without Redis the in-process fallback is used unless local is False, for
+    callers that already cache in memory themselves.
+    """
+    if redis_client is None:
+        if not local:
+            return None
+        entry = _local_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _local_cache[key]
+            return None
+        _local_cache.move_to_end(key)
+        return entry[1]
+
+    try:
+        return await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {str(e)}")
+        return None
+
+async def cache_set(key: str, value: str, ttl: int, local: bool = True) -> None:
+    """Store a value with a TTL in seconds, ignoring Redis errors; see cache_get for local"""
+    if redis_client is None:
+        if not local:
+            return
+        _local_cache[key] = (time.monotonic() + ttl, value)
+        _local_cache.move_to_end(key)
+        while len(_local_cache) > LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+        return
+
+    try:
+        await redis_client.setex(key, ttl, value)
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {str(e)}")
@@ -0,0 +1,5 @@
+# constants.py
+
+# Brand context beyond this adds tokens (and latency) without improving tone
+# matching; the crawler stops building context here and prompts clip to it
+MAX_CONTEXT_CHARS = 2500
@@ -1,22 +1,145 @@
 # crawler.py
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from typing import List, Dict, Optional
+import asyncio
+import functools
+import io
+import re
+import aiohttp
+from async_lru import alru_cache
+from selectolax.lexbor import LexborHTMLParser
+from urllib.parse import ParseResult, parse_qsl, urlencode, urljoin, urlparse
+from typing import Callable, List, Dict, Optional, Tuple
 import logging
+from app.cache import make_key, cache_get, cache_set
+from app.constants import MAX_CONTEXT_CHARS
 
 logger = logging.getLogger(__name__)
 
+# Bump when the brand context format changes so stale cache entries are ignored
+CRAWL_CACHE_VERSION = "v4"
+CRAWL_CACHE_TTL = 6 * 60 * 60
+
+# Only the head and first screens of a page feed the brand context
+MAX_PAGE_BYTES = 262_144
+MAX_TEXT_CHARS = 6000
+
+# Enough of the home page to see its navigation links
+LINK_SCAN_BYTES = 65_536
+
+# Everything _extract_page_data needs, matched in document order by one query
+_PAGE_DATA_SELECTOR = 'title, meta[name="description"], meta[property="og:description"], h1, h2, h3'
+
+# Non-content elements dropped before text extraction
+_STRIP_TAGS = ('script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'noscript')
+_STRIP_SELECTOR = ', '.join(_STRIP_TAGS)
+
+# Retries for dropped or refused connections; timeouts and HTTP errors are not retried
+FETCH_RETRIES = 2
+FETCH_RETRY_BACKOFF = 0.3
+_RETRYABLE_ERRORS = (aiohttp.ServerDisconnectedError, aiohttp.ClientConnectorError)
+
+# ClientConnectorError subclasses that will fail the same way on every attempt
+_PERMANENT_ERRORS = (aiohttp.ClientConnectorDNSError, aiohttp.ClientSSLError)
+
+# Responses with any other Content-Type are not downloaded
+_HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# hrefs that never point at a crawlable page
+_SKIP_PREFIXES = ('#', 'mailto:', 'tel:', 'javascript:', 'data:')
+
+# Query parameters that only identify the referrer, not the page
+_TRACKING_PARAM_PREFIXES = ('utm_', 'gclid', 'fbclid', 'msclkid')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Same public resolvers app/db.py uses for MongoDB SRV lookups
+DNS_NAMESERVERS = ['1.1.1.1', '8.8.8.8']
+
+# Link-heavy pages repeat the same hrefs many times
+_cached_urlparse = functools.lru_cache(maxsize=4096)(urlparse)
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse runs of whitespace, including newlines inside tags, to single spaces"""
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def _normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for caching and fetching
+    
+    Lowercases the host, drops the fragment and tracking parameters, and gives
+    a bare host the root path. Other query parameters and the path's trailing
+    slash are kept since they select the page and how its relative links resolve.
+    """
+    parsed = _cached_urlparse(url.strip())
+    query = urlencode([
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not name.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    ])
+    return parsed._replace(
+        netloc=parsed.netloc.lower(),
+        path=parsed.path or '/',
+        query=query,
+        fragment=''
+    ).geturl()
+
+def _fast_join(base_parts: ParseResult, base_prefix: str, base_url: str, href: str) -> Optional[str]:
+    """
+    Resolve href against the base URL without query or fragment
+    
+    Root-relative and absolute same-site hrefs are handled with string
+    operations; only other relative hrefs go through urljoin/urlparse.
+    
+    Returns:
+        The resolved URL, or None if it points at another host
+    """
+    if href.startswith('/') and not href.startswith('//'):
+        return base_prefix + href.partition('#')[0].partition('?')[0]
+    
+    if href == base_prefix or href.startswith(base_prefix + '/'):
+        return href.partition('#')[0].partition('?')[0]
+    
+    parsed = _cached_urlparse(urljoin(base_url, href))
+    netloc = parsed.netloc.lower()
+    if netloc != base_parts.netloc.lower():
+        return None
+    return f"{parsed.scheme}://{netloc}{parsed.path}"
+
+class _CrawlFailed(Exception):
+    """Raised inside the cached crawl so failures are not memoized"""
+
 class WebCrawler:
     def __init__(self):
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept-Encoding': 'gzip, deflate, br'
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it inside the running loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                resolver=aiohttp.AsyncResolver(nameservers=DNS_NAMESERVERS),
+                limit=100,
+                limit_per_host=8,
+                use_dns_cache=True,
+                ttl_dns_cache=600
+            )
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
-    def crawl_website(self, base_url: str, max_inner_pages: int = 2) -> Optional[str]:
+    async def crawl_website(self, base_url: str, max_inner_pages: int = 2) -> Optional[str]:
         """
         Crawl website and return brand context string for LLM
         
+        Results are cached per normalized URL in memory and, when configured,
+        in Redis, so variants like host case or utm_* parameters share an entry.
+        
         Args:
             base_url: The website homepage URL
             max_inner_pages: Number of inner pages to crawl
@@ -25,36 +148,43 @@ class WebCrawler:
             String with brand context, or None if crawl fails
         """
         try:
-            pages_data = []
-            
-            # Crawl home page
-            logger.info(f"Crawling: {base_url}")
-            home_data = self._fetch_page_data(base_url)
+            return await self._cached_crawl(_normalize_url(base_url), max_inner_pages)
+        except ValueError as e:
+            # urlparse rejects malformed URLs such as "http://[bad"
+            logger.warning(f"Invalid website URL {base_url!r}: {str(e)}")
+            return None
+        except _CrawlFailed:
+            return None
+    
+    @alru_cache(maxsize=512, ttl=CRAWL_CACHE_TTL)
+    async def _cached_crawl(self, base_url: str, max_inner_pages: int) -> str:
+        """Crawl through the shared cache, raising _CrawlFailed on failure"""
+        key = make_key(f"crawl:{CRAWL_CACHE_VERSION}", base_url, max_inner_pages)
+        
+        # alru_cache is already the in-process layer; only Redis is shared
+        brand_context = await cache_get(key, local=False)
+        if brand_context is not None:
+            logger.info(f"Crawl cache hit: {base_url}")
+            return brand_context
+        
+        brand_context = await self._crawl(base_url, max_inner_pages)
+        if brand_context is None:
+            raise _CrawlFailed(base_url)
+        
+        await cache_set(key, brand_context, CRAWL_CACHE_TTL, local=False)
+        return brand_context
+    
+    async def _crawl(self, base_url: str, max_inner_pages: int) -> Optional[str]:
+        """Crawl the site and build its brand context, or return None on failure"""
+        try:
+            pages_data = await self.crawl_pages(base_url, max_inner_pages)
             
-            if not home_data:
+            if not pages_data:
                 logger.warning("Failed to crawl home page")
                 return None
             
-            pages_data.append(home_data)
-            
-            # Extract and crawl inner pages
-            try:
-                inner_links = self._extract_internal_links(base_url, home_data["html"])
-                
-                for link in inner_links[:max_inner_pages]:
-                    try:
-                        logger.info(f"Crawling inner page: {link}")
-                        page_data = self._fetch_page_data(link)
-                        if page_data:
-                            pages_data.append(page_data)
-                    except Exception as e:
-                        logger.warning(f"Failed to crawl {link}: {str(e)}")
-                        continue
-            except Exception as e:
-                logger.warning(f"Failed to extract inner links: {str(e)}")
-            
             # Build and return brand context
-            brand_context = self._build_brand_context(pages_data)
+            brand_context = self.build_brand_context(pages_data)
             logger.info(f"✓ Crawled {len(pages_data)} pages successfully")
             return brand_context
             
@@ -62,114 +192,251 @@ class WebCrawler:
             logger.error(f"Crawl failed: {str(e)}")
             return None
     
-    def _fetch_page_data(self, url: str) -> Optional[Dict]:
-        """Fetch and parse a single page"""
+    async def crawl_pages(self, base_url: str, max_inner_pages: int = 2) -> List[Dict]:
+        """
+        Fetch the home page and inner pages concurrently over the shared session
+        
+        Uncached; crawl_website is the cached entry point for brand context.
+        
+        Args:
+            base_url: The website homepage URL
+            max_inner_pages: Number of inner pages to crawl
+        
+        Returns:
+            Page data dicts with the home page first, or an empty list if the
+            home page could not be fetched
+        """
+        base_url = _normalize_url(base_url)
+        pages_data = []
+        inner_links = []
+        inner_tasks = []
+        session = self._get_session()
+        
+        def schedule_inner_pages(tree: LexborHTMLParser) -> bool:
+            """
+            Start fetches for inner links not scheduled yet
+            
+            May run on a partial home page and again on the full one, so links
+            already scheduled are skipped. Returns True once enough are scheduled.
+            """
+            try:
+                links = self._extract_internal_links(base_url, tree, max_inner_pages)
+            except Exception as e:
+                logger.warning(f"Failed to extract inner links: {str(e)}")
+                return False
+            
+            for link in links:
+                if len(inner_links) >= max_inner_pages:
+                    break
+                if link in inner_links:
+                    continue
+                logger.info(f"Crawling inner page: {link}")
+                inner_links.append(link)
+                inner_tasks.append(asyncio.create_task(self._fetch_page_data(session, link)))
+            
+            return len(inner_links) >= max_inner_pages
+        
+        # Crawl home page
+        logger.info(f"Crawling: {base_url}")
+        home_data = await self._fetch_page_data(session, base_url, on_links=schedule_inner_pages)
+        
+        if not home_data:
+            for task in inner_tasks:
+                task.cancel()
+            return []
+        
+        pages_data.append(home_data)
+        
+        results = await asyncio.gather(*inner_tasks, return_exceptions=True)
+        
+        for link, page_data in zip(inner_links, results):
+            if isinstance(page_data, Exception):
+                logger.warning(f"Failed to crawl {link}: {str(page_data)}")
+            elif page_data:
+                pages_data.append(page_data)
+        
+        return pages_data
+    
+    async def _fetch_page_data(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        on_links: Optional[Callable[[LexborHTMLParser], bool]] = None
+    ) -> Optional[Dict]:
+        """
+        Fetch and parse a single page
+        
+        Args:
+            session: Shared HTTP session
+            url: Page URL
+            on_links: Called with a tree of the first LINK_SCAN_BYTES of HTML so
+                link extraction can start early; if it returns False (e.g. the
+                prefix was all inline <head> styles) it is called again with the
+                full tree. Pages smaller than that are parsed once and the same
+                tree is reused for page data
+        """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            for attempt in range(FETCH_RETRIES + 1):
+                try:
+                    content, on_links = await self._download(session, url, on_links)
+                    break
+                except _RETRYABLE_ERRORS as e:
+                    if attempt == FETCH_RETRIES or isinstance(e, _PERMANENT_ERRORS):
+                        raise
+                    logger.warning(f"Retrying {url} after connection error: {str(e)}")
+                    await asyncio.sleep(FETCH_RETRY_BACKOFF * 2 ** attempt)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if content is None:
+                return None
+            
+            # Parsing and extraction are CPU-bound; keep them off the event loop
+            tree = await asyncio.to_thread(LexborHTMLParser, bytes(content))
             
-            page_data = {
-                "url": url,
-                "title": self._get_title(soup),
-                "meta_description": self._get_meta_description(soup),
-                "headings": self._get_headings(soup),
-                "text_content": self._get_clean_text(soup),
-                "html": str(soup)
-            }
+            if on_links:
+                on_links(tree)
             
-            return page_data
+            return await asyncio.to_thread(self._extract_page_data, url, tree)
             
         except Exception as e:
             logger.error(f"Error fetching {url}: {str(e)}")
             return None
     
-    def _get_title(self, soup: BeautifulSoup) -> str:
-        """Extract page title"""
-        title_tag = soup.find('title')
-        return title_tag.get_text(strip=True) if title_tag else ""
-    
-    def _get_meta_description(self, soup: BeautifulSoup) -> str:
-        """Extract meta description"""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            return meta_desc['content'].strip()
+    async def _download(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        on_links: Optional[Callable[[LexborHTMLParser], bool]]
+    ) -> Tuple[Optional[bytearray], Optional[Callable[[LexborHTMLParser], bool]]]:
+        """
+        Download up to MAX_PAGE_BYTES of an HTML page
         
-        og_desc = soup.find('meta', attrs={'property': 'og:description'})
-        if og_desc and og_desc.get('content'):
-            return og_desc['content'].strip()
+        Returns:
+            The body (None for non-HTML responses) and on_links unless the early
+            scan of the first LINK_SCAN_BYTES found enough links
+        """
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            
+            content_type = response.headers.get('Content-Type', 'text/html').lower()
+            if not content_type.startswith(_HTML_CONTENT_TYPES):
+                logger.warning(f"Skipping non-HTML page {url}: {content_type}")
+                return None, on_links
+            
+            # Stop downloading once the size cap is reached
+            content = bytearray()
+            early_scan = on_links is not None
+            async for chunk in response.content.iter_chunked(16384):
+                content.extend(chunk)
+                if early_scan and len(content) >= LINK_SCAN_BYTES:
+                    early_scan = False
+                    if on_links(await asyncio.to_thread(LexborHTMLParser, bytes(content))):
+                        on_links = None
+                if len(content) >= MAX_PAGE_BYTES:
+                    break
         
-        return ""
+        del content[MAX_PAGE_BYTES:]
+        return content, on_links
     
-    def _get_headings(self, soup: BeautifulSoup) -> Dict[str, List[str]]:
-        """Extract all headings"""
+    def _extract_page_data(self, url: str, tree: LexborHTMLParser) -> Dict:
+        """Extract title, description, headings and clean text in one selector pass"""
+        title = ""
+        meta_description = ""
+        og_description = ""
         headings = {"h1": [], "h2": [], "h3": []}
         
-        for level in ["h1", "h2", "h3"]:
-            for tag in soup.find_all(level):
-                text = tag.get_text(strip=True)
+        for node in tree.css(_PAGE_DATA_SELECTOR):
+            tag = node.tag
+            
+            if tag == 'title':
+                if not title:
+                    title = _collapse_whitespace(node.text())
+            elif tag == 'meta':
+                content = _collapse_whitespace(node.attributes.get('content') or '')
+                if node.attributes.get('name') == 'description':
+                    meta_description = meta_description or content
+                else:
+                    og_description = og_description or content
+            else:
+                text = _collapse_whitespace(node.text())
                 if text:
-                    headings[level].append(text)
+                    headings[tag].append(text)
         
-        return headings
+        return {
+            "url": url,
+            "title": title,
+            "meta_description": meta_description or og_description,
+            "headings": headings,
+            "text_content": self._get_clean_text(tree)
+        }
     
-    def _get_clean_text(self, soup: BeautifulSoup) -> str:
+    def _get_clean_text(self, tree: LexborHTMLParser) -> str:
         """Extract clean text content"""
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'noscript']):
+        for element in tree.css(_STRIP_SELECTOR):
             element.decompose()
         
-        text = soup.get_text(separator=' ', strip=True)
-        
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        # Truncate before normalizing so the work is bounded regardless of page size
+        text = tree.body.text(separator=' ', strip=True)[:MAX_TEXT_CHARS] if tree.body else ""
         
-        return text[:3000]
+        return _collapse_whitespace(text)[:3000]
     
-    def _extract_internal_links(self, base_url: str, html: str) -> List[str]:
-        """Extract internal links from HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
-        base_domain = urlparse(base_url).netloc
+    def _extract_internal_links(self, base_url: str, tree: LexborHTMLParser, max_inner_pages: int = 2) -> List[str]:
+        """Extract internal links from a parsed page, stopping once enough are found"""
+        base = _cached_urlparse(base_url)
+        base_prefix = f"{base.scheme}://{base.netloc}"
+        base_stripped = base_url.rstrip('/')
         
-        links = set()
+        # Cushion over max_inner_pages so a rescan of the full home page still
+        # finds links that the early scan did not already schedule
+        limit = max_inner_pages * 4
+        links = {}
         
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
+        for a_tag in tree.css('a[href]'):
+            href = a_tag.attributes['href']
             
-            if href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
+            if not href or href.startswith(_SKIP_PREFIXES):
                 continue
             
-            full_url = urljoin(base_url, href)
-            parsed = urlparse(full_url)
+            clean_url = _fast_join(base, base_prefix, base_url, href)
             
-            if parsed.netloc == base_domain:
-                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                
-                if clean_url.rstrip('/') != base_url.rstrip('/'):
-                    links.add(clean_url)
+            if clean_url and clean_url.rstrip('/') != base_stripped:
+                links[clean_url] = None
+                if len(links) >= limit:
+                    break
         
-        return list(links)[:5]  # Limit to 5 links
+        return list(links)
     
-    def _build_brand_context(self, pages: List[Dict]) -> str:
-        """Build brand context string from crawled pages"""
-        context_parts = []
+    def build_brand_context(self, pages: List[Dict]) -> str:
+        """Build brand context string from crawled pages, capped at MAX_CONTEXT_CHARS"""
+        buf = io.StringIO()
         
         for i, page in enumerate(pages):
             if i == 0:
-                context_parts.append(f"=== HOME PAGE ===\nURL: {page['url']}")
+                buf.write("=== HOME PAGE ===\nURL: ")
             else:
-                context_parts.append(f"\n=== PAGE {i} ===\nURL: {page['url']}")
+                buf.write("\n\n=== PAGE ")
+                buf.write(str(i))
+                buf.write(" ===\nURL: ")
+            buf.write(page['url'])
             
             if page['title']:
-                context_parts.append(f"Title: {page['title']}")
+                buf.write("\nTitle: ")
+                buf.write(page['title'])
             
             if page['meta_description']:
-                context_parts.append(f"Description: {page['meta_description']}")
+                buf.write("\nDescription: ")
+                buf.write(page['meta_description'])
             
             if page['headings']['h1']:
-                context_parts.append(f"Main Headings: {', '.join(page['headings']['h1'][:3])}")
+                buf.write("\nMain Headings: ")
+                buf.write(', '.join(page['headings']['h1'][:3]))
             
-            context_parts.append(f"Content Preview:\n{page['text_content'][:800]}")
+            buf.write("\nContent Preview:\n")
+            buf.write(page['text_content'][:800])
+            
+            if buf.tell() >= MAX_CONTEXT_CHARS:
+                break
         
-        return '\n'.join(context_parts)
\ No newline at end of file
+        return buf.getvalue()[:MAX_CONTEXT_CHARS]
+
+# Shared instance so the HTTP session (and its keep-alive pool) lives for the process
+crawler = WebCrawler()
\ No newline at end of file
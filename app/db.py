@@ -1,8 +1,8 @@
 # db.py
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ServerSelectionTimeoutError
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from bson.objectid import ObjectId
 
 import dns.resolver
@@ -14,94 +14,118 @@ MONGODB_URI = os.getenv("MONGODB_URI")
 if not MONGODB_URI:
     raise ValueError("MONGODB_URI not found in environment variables")
 
+# Per worker process; each uvicorn worker imports this module and gets its own pool
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+
 import ssl
-client = MongoClient(
+client = AsyncIOMotorClient(
     MONGODB_URI, 
     serverSelectionTimeoutMS=5000, 
+    maxPoolSize=MONGODB_MAX_POOL_SIZE,
     tls=True,
     tlsAllowInvalidCertificates=True  # For development - allows connection despite SSL certificate issues
 )
 db = client["ai_dlp"]
 pages_collection = db["pages"]
 
-def init_db():
-    """Initialize database indices"""
+# (keys, options) for each index on the pages collection
+PAGE_INDEXES = [
+    ([("page_id", 1)], {"unique": True}),
+    ([("created_at", 1)], {}),
+    ([("user_id", 1)], {}),
+    ([("updated_at", -1)], {}),
+    ([("user_id", 1), ("updated_at", -1)], {}),
+]
+
+async def ping_db():
+    """Check the MongoDB connection"""
     try:
-        # Test connection
-        client.admin.command('ping')
+        await client.admin.command('ping')
         print("✓ MongoDB connected")
-        
-        # Create indices
-        pages_collection.create_index("page_id", unique=True)
-        pages_collection.create_index("created_at")
-        pages_collection.create_index("user_id")
-        print("✓ Database indices created")
     except ServerSelectionTimeoutError:
         print("✗ Failed to connect to MongoDB")
         raise
 
-def save_page(page_spec: dict, user_context: dict = None, crawled_context: str = None, user_id: str = None) -> dict:
+async def ensure_indexes():
+    """Create any missing indices; safe to run in the background on every cold start"""
+    try:
+        existing = await pages_collection.index_information()
+        
+        for keys, options in PAGE_INDEXES:
+            name = "_".join(f"{field}_{direction}" for field, direction in keys)
+            if name not in existing:
+                await pages_collection.create_index(keys, name=name, **options)
+        
+        print("✓ Database indices ready")
+    except Exception as e:
+        print(f"✗ Failed to create database indices: {e}")
+
+async def save_page(page_spec: dict, user_context: dict = None, crawled_context: str = None, user_id: str = None) -> dict:
     """Save page spec to MongoDB"""
+    now = datetime.now(timezone.utc)
     document = {
         "page_id": page_spec.get("pageId"),
         "version": page_spec.get("version", 1),
         "sections": page_spec.get("sections", []),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow(),
+        "created_at": now,
+        "updated_at": now,
         "user_id": user_id,
         "published": False,
         "user_context": user_context or {},
         "crawled_context": crawled_context
     }
     
-    result = pages_collection.insert_one(document)
+    result = await pages_collection.insert_one(document)
     document["_id"] = str(result.inserted_id)
     return document
 
-def get_page(page_id: str) -> dict:
+async def get_page(page_id: str) -> dict:
     """Retrieve page by ID"""
-    page = pages_collection.find_one({"page_id": page_id})
+    page = await pages_collection.find_one({"page_id": page_id})
     if page:
         page["_id"] = str(page["_id"])
     return page
 
-def get_all_pages(user_id: str = None, limit: int = 50) -> list:
-    """Retrieve all pages with optional user filtering"""
+async def get_all_pages(user_id: str = None, limit: int = 50) -> list:
+    """Retrieve page summaries, shaped for the API, with optional user filtering"""
     query = {}
     if user_id:
         query["user_id"] = user_id
     
-    pages = pages_collection.find(query).sort("updated_at", -1).limit(limit)
+    # Project summaries server-side, already in the camelCase response shape, so
+    # sections and crawled context never leave MongoDB
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"updated_at": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "pageId": "$page_id",
+            "version": {"$ifNull": ["$version", 1]},
+            "sectionCount": {"$size": {"$ifNull": ["$sections", []]}},
+            "createdAt": {"$ifNull": ["$created_at", None]},
+            "updatedAt": {"$ifNull": ["$updated_at", None]},
+            "published": {"$ifNull": ["$published", False]}
+        }}
+    ]
     
-    result = []
-    for page in pages:
-        result.append({
-            "_id": str(page["_id"]),
-            "page_id": page["page_id"],
-            "version": page.get("version", 1),
-            "section_count": len(page.get("sections", [])),
-            "created_at": page.get("created_at"),
-            "updated_at": page.get("updated_at"),
-            "published": page.get("published", False)
-        })
-    
-    return result
+    return await pages_collection.aggregate(pipeline).to_list(limit)
 
-def update_page(page_id: str, sections: list) -> dict:
+async def update_page(page_id: str, sections: list) -> dict:
     """Update page sections and increment version"""
-    page = get_page(page_id)
+    page = await get_page(page_id)
     if not page:
         return None
     
     new_version = page.get("version", 1) + 1
     
-    result = pages_collection.find_one_and_update(
+    result = await pages_collection.find_one_and_update(
         {"page_id": page_id},
         {
             "$set": {
                 "sections": sections,
                 "version": new_version,
-                "updated_at": datetime.utcnow()
+                "updated_at": datetime.now(timezone.utc)
             }
         },
         return_document=True
@@ -111,14 +135,92 @@ def update_page(page_id: str, sections: list) -> dict:
         result["_id"] = str(result["_id"])
     return result
 
-def publish_page(page_id: str) -> dict:
+async def bulk_update_sections(page_id: str, section_updates: dict) -> dict:
+    """
+    Update the data of several sections in one round-trip and increment version
+    
+    Args:
+        page_id: The page ID
+        section_updates: mapping of section ID to its new data
+    
+    Returns:
+        dict: Updated page, or None if the page or any of the sections is missing
+    """
+    updates = list(section_updates.items())
+    
+    fields = {f"sections.$[s{i}].data": data for i, (_, data) in enumerate(updates)}
+    fields["updated_at"] = datetime.now(timezone.utc)
+    
+    result = await pages_collection.find_one_and_update(
+        {"page_id": page_id, "sections.id": {"$all": [section_id for section_id, _ in updates]}},
+        {
+            "$set": fields,
+            "$inc": {"version": 1}
+        },
+        array_filters=[{f"s{i}.id": section_id} for i, (section_id, _) in enumerate(updates)],
+        return_document=True
+    )
+    
+    if result:
+        result["_id"] = str(result["_id"])
+    return result
+
+async def reorder_page(page_id: str, section_ids: list) -> dict:
+    """
+    Reorder sections server-side and increment version
+    
+    Rebuilds the sections array in MongoDB from the stored sections, so section
+    data is never sent back over the wire. Each section's order is set to its
+    position in section_ids.
+    
+    Args:
+        page_id: The page ID
+        section_ids: every section ID of the page, in the new order
+    
+    Returns:
+        dict: Updated page, or None if the page is missing or section_ids does not
+            match its sections
+    """
+    ordered_ids = {"$literal": section_ids}
+    
+    query = {"page_id": page_id, "sections": {"$size": len(section_ids)}}
+    # {"$all": []} matches nothing, so a page without sections needs only the size check
+    if section_ids:
+        query["sections.id"] = {"$all": section_ids}
+    
+    result = await pages_collection.find_one_and_update(
+        query,
+        [{
+            "$set": {
+                "sections": {
+                    "$map": {
+                        "input": ordered_ids,
+                        "as": "id",
+                        "in": {"$mergeObjects": [
+                            {"$arrayElemAt": ["$sections", {"$indexOfArray": ["$sections.id", "$$id"]}]},
+                            {"order": {"$indexOfArray": [ordered_ids, "$$id"]}}
+                        ]}
+                    }
+                },
+                "version": {"$add": [{"$ifNull": ["$version", 1]}, 1]},
+                "updated_at": datetime.now(timezone.utc)
+            }
+        }],
+        return_document=True
+    )
+    
+    if result:
+        result["_id"] = str(result["_id"])
+    return result
+
+async def publish_page(page_id: str) -> dict:
     """Mark page as published"""
-    result = pages_collection.find_one_and_update(
+    result = await pages_collection.find_one_and_update(
         {"page_id": page_id},
         {
             "$set": {
                 "published": True,
-                "updated_at": datetime.utcnow()
+                "updated_at": datetime.now(timezone.utc)
             }
         },
         return_document=True
@@ -128,7 +230,7 @@ def publish_page(page_id: str) -> dict:
         result["_id"] = str(result["_id"])
     return result
 
-def delete_page(page_id: str) -> bool:
+async def delete_page(page_id: str) -> bool:
     """Delete a page"""
-    result = pages_collection.delete_one({"page_id": page_id})
+    result = await pages_collection.delete_one({"page_id": page_id})
     return result.deleted_count > 0
\ No newline at end of file
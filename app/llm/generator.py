@@ -1,9 +1,13 @@
 # generator.py
 import os
-import json
-from openai import OpenAI
-from .prompts import build_landing_page_prompt, build_section_regenerate_prompt
-from app.crawler import WebCrawler
+import uuid
+import hashlib
+import orjson
+from typing import AsyncIterator
+from openai import AsyncOpenAI
+from .prompts import LANDING_PAGE_SCHEMA, build_landing_page_prompt, build_section_regenerate_prompt
+from app.crawler import crawler
+from app.cache import make_key, cache_get, cache_set
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,16 +18,45 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY not found in environment variables")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 
-crawler = WebCrawler()
+LLM_CACHE_TTL = 60 * 60
 
-def generate_page_spec(user_input: dict, crawled_context: str = None) -> dict:
+SYSTEM_PROMPT = (
+    "You are an expert landing page designer and conversion copywriter. "
+    "You create compelling marketing copy that drives action, matches brand voice, "
+    "and resonates with target audiences. You have deep knowledge of persuasive writing, "
+    "user psychology, and marketing best practices. "
+    "You always return your work as valid JSON with no markdown formatting."
+)
+
+# Structured outputs guarantee schema-valid JSON for page generation
+PAGE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "LandingPage",
+        "schema": LANDING_PAGE_SCHEMA,
+        "strict": True
+    }
+}
+
+def _page_cache_key(user_input: dict, crawled_context: str = None) -> str:
+    """Cache key for a generated page from normalized user input and crawled context"""
+    normalized = orjson.dumps(
+        {key: " ".join(str(value).split()) for key, value in user_input.items()},
+        option=orjson.OPT_SORT_KEYS
+    ).decode()
+    context_hash = hashlib.sha256((crawled_context or "").encode()).hexdigest()
+    return make_key("llm:page:v2", normalized, context_hash)
+
+async def generate_page_spec(user_input: dict, crawled_context: str = None, force: bool = False) -> dict:
     """
     Generate a complete landing page spec using OpenAI
     
     Args:
         user_input: dict with industry, offer, target_audience, brand_tone, and optional url
+        crawled_context: brand context already crawled by the caller, if any
+        force: skip the response cache and always call the LLM
     
     Returns:
         dict: page specification JSON
@@ -31,16 +64,15 @@ def generate_page_spec(user_input: dict, crawled_context: str = None) -> dict:
     try:
         # Extract URL if provided
         website_url = user_input.get("url")
-        crawled_context = None
         
         print(f"\n[GENERATOR] user_input keys: {user_input.keys()}", flush=True)
         print(f"[GENERATOR] website_url: {website_url}", flush=True)
         
-        # Crawl website if URL provided
-        if website_url:
+        # Crawl website if URL provided and the caller has not crawled it already
+        if website_url and not crawled_context:
             print(f"[GENERATOR] Starting crawl of: {website_url}", flush=True)
             logger.info(f"Crawling website: {website_url}")
-            crawled_context = crawler.crawl_website(website_url)
+            crawled_context = await crawler.crawl_website(website_url)
             print(f"[GENERATOR] Crawl result: {crawled_context is not None}", flush=True)
             if crawled_context:
                 print(f"[GENERATOR] Crawled context length: {len(crawled_context)}", flush=True)
@@ -48,7 +80,7 @@ def generate_page_spec(user_input: dict, crawled_context: str = None) -> dict:
             else:
                 print(f"[GENERATOR] Crawl returned None", flush=True)
                 logger.warning("Website crawl failed, proceeding without brand context")
-        else:
+        elif not website_url:
             print(f"[GENERATOR] No URL provided", flush=True)
             logger.info("No URL provided, generating without brand context")
         
@@ -58,24 +90,28 @@ def generate_page_spec(user_input: dict, crawled_context: str = None) -> dict:
             logger.info(f"Crawled context length: {len(crawled_context)} characters")
             logger.debug(f"First 500 chars of context: {crawled_context[:500]}")
         
+        # Identical inputs return the cached spec under a fresh page ID
+        cache_key = _page_cache_key(user_input, crawled_context)
+        if not force:
+            cached = await cache_get(cache_key)
+            if cached:
+                logger.info("LLM cache hit, skipping generation")
+                page_spec = orjson.loads(cached)
+                page_spec["pageId"] = f"landing-{uuid.uuid4().hex[:8]}"
+                return page_spec
+        
         prompt = build_landing_page_prompt(user_input, crawled_context)
         
         # Log the actual prompt being sent
         logger.debug(f"Full prompt length: {len(prompt)} characters")
         logger.debug(f"Prompt contains 'BRAND CONTEXT': {'BRAND CONTEXT' in prompt}")
         
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
                     "role": "system",
-                    "content": (
-                        "You are an expert landing page designer and conversion copywriter. "
-                        "You create compelling marketing copy that drives action, matches brand voice, "
-                        "and resonates with target audiences. You have deep knowledge of persuasive writing, "
-                        "user psychology, and marketing best practices. "
-                        "You always return your work as valid JSON with no markdown formatting."
-                    )
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -83,23 +119,68 @@ def generate_page_spec(user_input: dict, crawled_context: str = None) -> dict:
                 }
             ],
             temperature=0.7,
-            max_tokens=2500
+            max_tokens=2500,
+            response_format=PAGE_RESPONSE_FORMAT
         )
         
+        message = response.choices[0].message
+        if message.refusal:
+            raise ValueError(f"LLM refused to generate page: {message.refusal}")
+        
         # Extract response text
-        response_text = response.choices[0].message.content
+        response_text = message.content
         
         # Parse JSON
-        page_spec = json.loads(response_text)
+        page_spec = orjson.loads(response_text)
+        await cache_set(cache_key, response_text, LLM_CACHE_TTL)
         return page_spec
             
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Failed to parse LLM response as JSON: {e}")
+    except ValueError:
+        # Refusals surface as ValueError so the route answers 400, not 500
+        raise
     except Exception as e:
         raise Exception(f"Error generating page spec: {str(e)}")
 
 
-def regenerate_section(section: dict, prompt: str) -> dict:
+async def stream_page_spec(user_input: dict, crawled_context: str = None) -> AsyncIterator[str]:
+    """
+    Stream a landing page spec from OpenAI as it is generated
+    
+    Args:
+        user_input: dict with industry, offer, target_audience, brand_tone
+        crawled_context: brand context already crawled by the caller, if any
+    
+    Yields:
+        str: raw JSON fragments; joined they form the page specification
+    """
+    prompt = build_landing_page_prompt(user_input, crawled_context)
+    
+    stream = await client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        temperature=0.7,
+        max_tokens=2500,
+        response_format=PAGE_RESPONSE_FORMAT,
+        stream=True
+    )
+    
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def regenerate_section(section: dict, prompt: str) -> dict:
     """
     Regenerate a single section with new prompt
     
@@ -117,22 +198,16 @@ def regenerate_section(section: dict, prompt: str) -> dict:
         
         if website_url:
             logger.info(f"Crawling website for section regeneration: {website_url}")
-            crawled_context = crawler.crawl_website(website_url)
+            crawled_context = await crawler.crawl_website(website_url)
         
         prompt = build_section_regenerate_prompt(section, prompt, crawled_context)
         
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
                     "role": "system",
-                    "content": (
-                        "You are an expert landing page designer and conversion copywriter. "
-                        "You create compelling marketing copy that drives action, matches brand voice, "
-                        "and resonates with target audiences. You have deep knowledge of persuasive writing, "
-                        "user psychology, and marketing best practices. "
-                        "You always return your work as valid JSON with no markdown formatting."
-                    )
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -147,10 +222,10 @@ def regenerate_section(section: dict, prompt: str) -> dict:
         response_text = response.choices[0].message.content
         
         # Parse JSON
-        updated_section = json.loads(response_text)
+        updated_section = orjson.loads(response_text)
         return updated_section
             
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Failed to parse LLM response as JSON: {e}")
     except Exception as e:
         raise Exception(f"Error regenerating section: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,129 @@
 # prompts.py
 import json
-import uuid
+from app.constants import MAX_CONTEXT_CHARS
 
-def build_landing_page_prompt(user_input: dict, crawled_context: str = None) -> str:
-    """Build the main prompt for landing page generation"""
+BRAND_TONE_INSTRUCTION = """
+CRITICAL: Use the above brand context as your PRIMARY reference for:
+- Tone of voice and writing style
+- Language patterns and vocabulary
+- Brand personality and messaging approach
+- Visual aesthetic (colors, imagery style)
+- Value propositions and positioning
+
+The generated landing page should feel like a natural extension of the existing brand website.
+Match the sophistication level, formality, and emotional tone you observe in the crawled content.
+"""
+
+BRAND_CONTENT_GUIDELINES = """1. **Tone Matching**: Carefully analyze the writing style, vocabulary, and sentence structure in the brand context. Mirror this style precisely.
+2. **Voice Consistency**: If the brand is casual and conversational, be casual. If formal and authoritative, match that.
+3. **Vocabulary**: Use similar terminology, industry jargon, and word choices as seen in the context.
+4. **Messaging Alignment**: Echo the value propositions and benefits mentioned in the brand context.
+5. **Visual Alignment**: If the context mentions colors or aesthetic preferences, respect those."""
+
+GENERAL_CONTENT_GUIDELINES = """- Headlines should be compelling and benefit-driven (5-8 words)
+- Subheadlines should expand on the value proposition (1-2 sentences)
+- Features should focus on benefits, not just features
+- Testimonials should feel authentic and specific
+- FAQs should address real objections and concerns
+- CTAs should be action-oriented and clear"""
+
+def _string(description: str) -> dict:
+    return {"type": "string", "description": description}
+
+def _object(properties: dict) -> dict:
+    """Strict structured-output object: every property required, nothing extra"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+def _array(items: dict, description: str) -> dict:
+    return {"type": "array", "items": items, "description": description}
+
+def _section(section_type: str, data: dict) -> dict:
+    return _object({
+        "id": _string(f"Section ID, e.g. '{section_type}-1'"),
+        "type": {"type": "string", "enum": [section_type]},
+        "order": {"type": "integer", "description": "Zero-based position on the page"},
+        "data": _object(data)
+    })
 
-    unique_page_id = f"landing-{uuid.uuid4().hex[:8]}"
+# Sent as a strict response_format schema so the prompt no longer carries a JSON skeleton
+LANDING_PAGE_SCHEMA = _object({
+    "sections": _array(
+        {"anyOf": [
+            _section("hero", {
+                "headline": _string("Powerful main headline (5-8 words, benefit-focused)"),
+                "subheadline": _string("Supporting headline that expands the value prop (1-2 sentences)"),
+                "ctaText": _string("Action button text (3-5 words, e.g. 'Start Free Trial', 'Get Started Now')"),
+                "backgroundImage": _string("Relevant Unsplash image URL (https://images.unsplash.com/photo-...)"),
+                "textColor": _string("Hex color, e.g. '#FFFFFF'"),
+                "backgroundColor": _string("Hex color, e.g. '#1a1a1a'")
+            }),
+            _section("features", {
+                "title": _string("Section headline"),
+                "description": _string("Section description (1-2 sentences)"),
+                "items": _array(_object({
+                    "id": _string("Feature ID: 'f1', 'f2', 'f3'"),
+                    "title": _string("Feature name (2-4 words)"),
+                    "description": _string("Benefit-focused description (1 sentence, what the customer gains)"),
+                    "icon": _string("Single relevant emoji")
+                }), "Exactly 3 features")
+            }),
+            _section("testimonials", {
+                "title": _string("Section title (e.g. 'What Our Customers Say', 'Trusted By Thousands')"),
+                "items": _array(_object({
+                    "id": _string("Testimonial ID: 't1', 't2'"),
+                    "quote": _string("Authentic testimonial (1-2 sentences, specific results or benefits)"),
+                    "author": _string("Realistic first and last name"),
+                    "role": _string("Job title"),
+                    "company": _string("Company name (real or realistic-sounding)"),
+                    "rating": {"type": "integer", "description": "Star rating, 5"}
+                }), "Exactly 2 testimonials")
+            }),
+            _section("faq", {
+                "title": _string("Section title, e.g. 'Frequently Asked Questions'"),
+                "items": _array(_object({
+                    "id": _string("Question ID: 'q1', 'q2', 'q3'"),
+                    "question": _string("Common objection or question (conversational style)"),
+                    "answer": _string("Clear, concise answer (1-2 sentences)")
+                }), "Exactly 3 questions")
+            }),
+            _section("contact", {
+                "title": _string("Compelling CTA headline (e.g. 'Ready to Transform Your Business?')"),
+                "description": _string("Supporting text that creates urgency or reinforces value (1-2 sentences)"),
+                "fields": _array(_object({
+                    "name": _string("Field name"),
+                    "label": _string("Field label"),
+                    "type": {"type": "string", "enum": ["email", "text", "textarea"]},
+                    "required": {"type": "boolean"}
+                }), (
+                    "Exactly these fields: email 'Email Address' (email, required), "
+                    "company 'Company Name' (text, optional), message 'How can we help?' (textarea, required)"
+                )),
+                "submitText": _string("Button text (e.g. 'Get Started', 'Request Demo')"),
+                "backgroundColor": _string("Hex color, e.g. '#f9fafb'")
+            }),
+            _section("footer", {
+                "links": _array(_object({
+                    "label": _string("Link label"),
+                    "url": _string("Link URL")
+                }), "Privacy Policy (/privacy), Terms of Service (/terms), Contact (/contact)"),
+                "socialLinks": _array(_object({
+                    "platform": _string("Platform name"),
+                    "url": _string("Profile URL")
+                }), "Twitter (https://twitter.com), LinkedIn (https://linkedin.com)"),
+                "copyright": _string("Copyright notice")
+            })
+        ]},
+        "Exactly six sections in this order: hero-1, features-1, testimonials-1, faq-1, contact-1, footer-1"
+    )
+})
+
+def build_landing_page_prompt(user_input: dict, crawled_context: str = None) -> str:
+    """Build the main prompt for landing page generation; structure comes from LANDING_PAGE_SCHEMA"""
     
     # Base context from user input
     industry = user_input.get('industry', 'general business')
@@ -15,29 +133,20 @@ def build_landing_page_prompt(user_input: dict, crawled_context: str = None) ->
     
     # Build brand context section
     brand_context_section = ""
-    tone_instruction = ""
     
     if crawled_context:
         brand_context_section = f"""
 ## BRAND CONTEXT (Crawled from Website)
-{crawled_context}
-
-"""
-        tone_instruction = """
-CRITICAL: Use the above brand context as your PRIMARY reference for:
-- Tone of voice and writing style
-- Language patterns and vocabulary
-- Brand personality and messaging approach
-- Visual aesthetic (colors, imagery style)
-- Value propositions and positioning
+{crawled_context[:MAX_CONTEXT_CHARS]}
 
-The generated landing page should feel like a natural extension of the existing brand website.
-Match the sophistication level, formality, and emotional tone you observe in the crawled content.
 """
+        tone_instruction = BRAND_TONE_INSTRUCTION
+        content_guidelines = BRAND_CONTENT_GUIDELINES
     else:
         tone_instruction = f"""
 Use a {brand_tone} tone throughout all copy.
 """
+        content_guidelines = GENERAL_CONTENT_GUIDELINES
     
     prompt = f"""You are an expert landing page designer and copywriter. Generate a landing page JSON specification that converts visitors into customers.
 
@@ -51,161 +160,14 @@ Use a {brand_tone} tone throughout all copy.
 
 ## CONTENT GUIDELINES
 
-**If brand context is provided above:**
-1. **Tone Matching**: Carefully analyze the writing style, vocabulary, and sentence structure in the brand context. Mirror this style precisely.
-2. **Voice Consistency**: If the brand is casual and conversational, be casual. If formal and authoritative, match that.
-3. **Vocabulary**: Use similar terminology, industry jargon, and word choices as seen in the context.
-4. **Messaging Alignment**: Echo the value propositions and benefits mentioned in the brand context.
-5. **Visual Alignment**: If the context mentions colors or aesthetic preferences, respect those.
-
-**General Guidelines:**
-- Headlines should be compelling and benefit-driven (5-8 words)
-- Subheadlines should expand on the value proposition (1-2 sentences)
-- Features should focus on benefits, not just features
-- Testimonials should feel authentic and specific
-- FAQs should address real objections and concerns
-- CTAs should be action-oriented and clear
-
-## TECHNICAL REQUIREMENTS
+{content_guidelines}
 
-Return ONLY valid JSON. No markdown code blocks (```json), no explanatory text, just raw JSON.
+## OUTPUT
 
-Use this exact structure: 
-
-{{
-  "pageId": "{unique_page_id}",
-  "version": 1,
-  "sections": [
-    {{
-      "id": "hero-1",
-      "type": "hero",
-      "order": 0,
-      "data": {{
-        "headline": "string - powerful main headline (5-8 words, benefit-focused)",
-        "subheadline": "string - supporting headline that expands the value prop (1-2 sentences)",
-        "ctaText": "string - action button text (3-5 words, e.g., 'Start Free Trial', 'Get Started Now')",
-        "backgroundImage": "https://images.unsplash.com/photo-... - relevant unsplash image URL",
-        "textColor": "#FFFFFF",
-        "backgroundColor": "#1a1a1a"
-      }}
-    }},
-    {{
-      "id": "features-1",
-      "type": "features",
-      "order": 1,
-      "data": {{
-        "title": "string - section headline",
-        "description": "string - optional section description (1-2 sentences)",
-        "items": [
-          {{
-            "id": "f1",
-            "title": "string - feature name (2-4 words)",
-            "description": "string - benefit-focused description (1 sentence, focus on what the customer gains)",
-            "icon": "emoji - single relevant emoji"
-          }},
-          {{
-            "id": "f2",
-            "title": "string",
-            "description": "string",
-            "icon": "emoji"
-          }},
-          {{
-            "id": "f3",
-            "title": "string",
-            "description": "string",
-            "icon": "emoji"
-          }}
-        ]
-      }}
-    }},
-    {{
-      "id": "testimonials-1",
-      "type": "testimonials",
-      "order": 2,
-      "data": {{
-        "title": "string - section title (e.g., 'What Our Customers Say', 'Trusted By Thousands')",
-        "items": [
-          {{
-            "id": "t1",
-            "quote": "string - authentic testimonial (1-2 sentences, focus on specific results or benefits)",
-            "author": "string - realistic first and last name",
-            "role": "string - job title",
-            "company": "string - company name (can be real or realistic-sounding)",
-            "rating": 5
-          }},
-          {{
-            "id": "t2",
-            "quote": "string",
-            "author": "string",
-            "role": "string",
-            "company": "string",
-            "rating": 5
-          }}
-        ]
-      }}
-    }},
-    {{
-      "id": "faq-1",
-      "type": "faq",
-      "order": 3,
-      "data": {{
-        "title": "Frequently Asked Questions",
-        "items": [
-          {{
-            "id": "q1",
-            "question": "string - common objection or question (conversational style)",
-            "answer": "string - clear, concise answer (1-2 sentences)"
-          }},
-          {{
-            "id": "q2",
-            "question": "string",
-            "answer": "string"
-          }},
-          {{
-            "id": "q3",
-            "question": "string",
-            "answer": "string"
-          }}
-        ]
-      }}
-    }},
-    {{
-      "id": "contact-1",
-      "type": "contact",
-      "order": 4,
-      "data": {{
-        "title": "string - compelling CTA headline (e.g., 'Ready to Transform Your Business?')",
-        "description": "string - supporting text that creates urgency or reinforces value (1-2 sentences)",
-        "fields": [
-          {{"name": "email", "label": "Email Address", "type": "email", "required": true}},
-          {{"name": "company", "label": "Company Name", "type": "text", "required": false}},
-          {{"name": "message", "label": "How can we help?", "type": "textarea", "required": true}}
-        ],
-        "submitText": "string - button text (e.g., 'Get Started', 'Request Demo')",
-        "backgroundColor": "#f9fafb"
-      }}
-    }},
-    {{
-      "id": "footer-1",
-      "type": "footer",
-      "order": 5,
-      "data": {{
-        "links": [
-          {{"label": "Privacy Policy", "url": "/privacy"}},
-          {{"label": "Terms of Service", "url": "/terms"}},
-          {{"label": "Contact", "url": "/contact"}}
-        ],
-        "socialLinks": [
-          {{"platform": "Twitter", "url": "https://twitter.com"}},
-          {{"platform": "LinkedIn", "url": "https://linkedin.com"}}
-        ],
-        "copyright": "© 2025 {offer if offer else 'Company'}. All rights reserved."
-      }}
-    }}
-  ]
-}}
+Fill in every section of the LandingPage schema, with "order" running 0-5 in section order.
+Footer copyright: "© 2025 {offer if offer else 'Company'}. All rights reserved."
 
-Generate the complete landing page JSON now:"""
+Generate the complete landing page now:"""
     
     return prompt
 
@@ -218,7 +180,7 @@ def build_section_regenerate_prompt(section: dict, user_context: dict, crawled_c
     
     crawl_info = ""
     if crawled_context:
-        crawl_info = f"\n\nBRAND CONTEXT FROM WEBSITE:\n{crawled_context}\n"
+        crawl_info = f"\n\nBRAND CONTEXT FROM WEBSITE:\n{crawled_context[:MAX_CONTEXT_CHARS]}\n"
     
     # Build section-specific regeneration instructions
     section_instructions = {
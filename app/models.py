@@ -14,6 +14,9 @@ class EditSectionRequest(BaseModel):
     section_id: str
     data: Dict[str, Any]
 
+class BulkEditSectionsRequest(BaseModel):
+    sections: List[EditSectionRequest] = Field(..., min_length=1)
+
 class ReorderSectionsRequest(BaseModel):
     sections: List[Dict[str, Any]]
 
@@ -0,0 +1,19 @@
+# responses.py
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered directly by orjson
+    
+    Naive datetimes from MongoDB are UTC and are written with a Z suffix;
+    unknown types such as ObjectId fall back to str.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        )
@@ -1,29 +1,105 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from app.models import (
     GeneratePageRequest,
     EditSectionRequest,
+    BulkEditSectionsRequest,
     ReorderSectionsRequest,
     PublishPageRequest,
     PageSpecResponse,
     PublishResponse
 )
-from app.llm.generator import generate_page_spec, regenerate_section
-from app.db import save_page, get_page, update_page, publish_page, delete_page
-from app.crawler import WebCrawler
+from app.llm.generator import generate_page_spec, stream_page_spec, regenerate_section
+from app.db import save_page, get_page, update_page, bulk_update_sections, reorder_page, publish_page, delete_page
+from app.crawler import crawler
+from app.responses import ORJSONResponse
+from typing import Type
 import uuid
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
-crawler = WebCrawler()
 
 router = APIRouter()
 
-@router.post("/pages/generate", response_model=PageSpecResponse)
-async def generate_landing_page(request: GeneratePageRequest):
+def _json_body(model: Type[BaseModel]):
+    """
+    Dependency that validates the raw request body with model_validate_json
+    
+    pydantic-core parses and validates the bytes in one pass instead of FastAPI
+    decoding to a dict first. Failures are raised as RequestValidationError so
+    clients still get FastAPI's usual 422 response. As with FastAPI's own body
+    handling, only JSON content types (or none) are accepted, so form-encoded or
+    text/plain "simple" cross-origin POSTs cannot skip the CORS preflight.
+    """
+    async def parse(request: Request) -> BaseModel:
+        content_type = request.headers.get("content-type")
+        if content_type:
+            media_type = content_type.partition(";")[0].strip().lower()
+            if media_type != "application/json" and not (
+                media_type.startswith("application/") and media_type.endswith("+json")
+            ):
+                raise RequestValidationError([{
+                    "type": "content_type",
+                    "loc": ("body",),
+                    "msg": "Content-Type must be application/json",
+                    "input": content_type
+                }])
+        
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+    
+    return parse
+
+def _body_docs(model: Type[BaseModel]) -> dict:
+    """OpenAPI requestBody for an endpoint that uses _json_body, with nested models inlined"""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+    
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
+
+async def _crawl_brand_context(website_url: str) -> str:
+    """Crawl the website for brand context, or return None if not provided or crawl fails"""
+    if not website_url:
+        return None
+    
+    logger.info(f"Crawling website: {website_url}")
+    crawled_context = await crawler.crawl_website(website_url)
+    if crawled_context:
+        logger.info("✓ Website crawled successfully")
+    else:
+        logger.warning("Website crawl failed, proceeding without brand context")
+    return crawled_context
+
+def _sse(event: str, data) -> bytes:
+    """Format a server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@router.post("/pages/generate", responses={200: {"model": PageSpecResponse}}, openapi_extra=_body_docs(GeneratePageRequest))
+async def generate_landing_page(request: GeneratePageRequest = Depends(_json_body(GeneratePageRequest)), force: bool = False):
     """
     Generate a new landing page spec from user input
     Optionally crawls website to extract brand context
     
+    Args:
+        request: Page requirements
+        force: Bypass the LLM response cache for identical inputs
+    
     Returns:
         PageSpecResponse: Generated page specification
     """
@@ -36,17 +112,10 @@ async def generate_landing_page(request: GeneratePageRequest):
         }
         
         # Crawl website if URL provided
-        crawled_context = None
-        if request.website_url:
-            logger.info(f"Crawling website: {request.website_url}")
-            crawled_context = crawler.crawl_website(request.website_url)
-            if crawled_context:
-                logger.info("✓ Website crawled successfully")
-            else:
-                logger.warning("Website crawl failed, proceeding without brand context")
+        crawled_context = await _crawl_brand_context(request.website_url)
         
         # Generate page spec from LLM (with or without crawled context)
-        page_spec = generate_page_spec(user_input, crawled_context)
+        page_spec = await generate_page_spec(user_input, crawled_context, force=force)
         
         # Assign unique ID if not present
         if "pageId" not in page_spec:
@@ -56,17 +125,20 @@ async def generate_landing_page(request: GeneratePageRequest):
             page_spec["version"] = 1
         
         # Save to database WITH context (for regeneration)
-        saved = save_page(
+        saved = await save_page(
             page_spec,
             user_context=user_input,
             crawled_context=crawled_context
         )
         
-        return PageSpecResponse(
+        # Validate the LLM output once and serialize it in pydantic-core, rather
+        # than letting response_model validate it again before encoding
+        response = PageSpecResponse(
             pageId=page_spec["pageId"],
             version=page_spec["version"],
             sections=page_spec["sections"]
         )
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
     except ValueError as e:
         raise HTTPException(
@@ -78,8 +150,69 @@ async def generate_landing_page(request: GeneratePageRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate landing page: {str(e)}"
         )
+
+@router.post("/pages/generate/stream", openapi_extra=_body_docs(GeneratePageRequest))
+async def generate_landing_page_stream(request: GeneratePageRequest = Depends(_json_body(GeneratePageRequest))):
+    """
+    Generate a new landing page spec, streaming LLM output as server-sent events
     
-@router.get("/pages", response_model=list)
+    Emits "status" events as the crawl and generation stages start, "chunk"
+    events with raw JSON fragments as tokens arrive, then a "done" event with
+    the saved page, or an "error" event on failure.
+    
+    Returns:
+        StreamingResponse: text/event-stream of generation progress
+    """
+    user_input = {
+        "industry": request.industry,
+        "offer": request.offer,
+        "target_audience": request.target_audience,
+        "brand_tone": request.brand_tone
+    }
+    
+    async def event_stream():
+        fragments = []
+        try:
+            # Crawl inside the stream so the first byte does not wait for it
+            crawled_context = None
+            if request.website_url:
+                yield _sse("status", {"stage": "crawling"})
+                crawled_context = await _crawl_brand_context(request.website_url)
+            
+            yield _sse("status", {"stage": "generating"})
+            
+            async for fragment in stream_page_spec(user_input, crawled_context):
+                fragments.append(fragment)
+                yield _sse("chunk", fragment)
+            
+            page_spec = orjson.loads("".join(fragments))
+            
+            if "pageId" not in page_spec:
+                page_spec["pageId"] = f"landing-{uuid.uuid4().hex[:8]}"
+            
+            if "version" not in page_spec:
+                page_spec["version"] = 1
+            
+            await save_page(
+                page_spec,
+                user_context=user_input,
+                crawled_context=crawled_context
+            )
+            
+            response = PageSpecResponse(
+                pageId=page_spec["pageId"],
+                version=page_spec["version"],
+                sections=page_spec["sections"]
+            )
+            yield _sse("done", response.model_dump())
+            
+        except Exception as e:
+            logger.error(f"Streaming generation failed: {str(e)}")
+            yield _sse("error", {"detail": f"Failed to generate landing page: {str(e)}"})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    
+@router.get("/pages")
 async def list_pages():
     """
     Retrieve all saved pages
@@ -89,16 +222,10 @@ async def list_pages():
     """
     try:
         from app.db import get_all_pages
-        pages = get_all_pages()
+        pages = await get_all_pages()
         
-        return [{
-            "pageId": page["page_id"],
-            "version": page["version"],
-            "sectionCount": page["section_count"],
-            "createdAt": page["created_at"].isoformat() if page.get("created_at") else None,
-            "updatedAt": page["updated_at"].isoformat() if page.get("updated_at") else None,
-            "published": page.get("published", False)
-        } for page in pages]
+        # Summaries come out of MongoDB in response shape; orjson writes the datetimes
+        return ORJSONResponse(pages)
         
     except Exception as e:
         raise HTTPException(
@@ -106,7 +233,7 @@ async def list_pages():
             detail=f"Failed to retrieve pages: {str(e)}"
         )
 
-@router.get("/pages/{page_id}", response_model=PageSpecResponse)
+@router.get("/pages/{page_id}", responses={200: {"model": PageSpecResponse}})
 async def get_landing_page(page_id: str):
     """
     Retrieve a saved landing page
@@ -118,7 +245,7 @@ async def get_landing_page(page_id: str):
         PageSpecResponse: The page specification with user context
     """
     try:
-        page = get_page(page_id)
+        page = await get_page(page_id)
         
         if not page:
             raise HTTPException(
@@ -130,14 +257,16 @@ async def get_landing_page(page_id: str):
         response_data = {
             "pageId": page["page_id"],
             "version": page["version"],
-            "sections": page["sections"]
+            "sections": page["sections"],
+            "user_context": None
         }
         
         # Add user_context if it exists
         if "user_context" in page and page["user_context"]:
             response_data["user_context"] = page["user_context"]
         
-        return response_data
+        # Data was validated on write; skip re-validating it through PageSpecResponse
+        return ORJSONResponse(response_data)
         
     except HTTPException:
         raise
@@ -147,8 +276,8 @@ async def get_landing_page(page_id: str):
             detail=f"Failed to retrieve page: {str(e)}"
         )
 
-@router.post("/pages/{page_id}/edit-section")
-async def edit_section(page_id: str, request: EditSectionRequest):
+@router.post("/pages/{page_id}/edit-section", openapi_extra=_body_docs(EditSectionRequest))
+async def edit_section(page_id: str, request: EditSectionRequest = Depends(_json_body(EditSectionRequest))):
     """
     Edit a specific section in a page
     
@@ -160,7 +289,7 @@ async def edit_section(page_id: str, request: EditSectionRequest):
         dict: Updated page
     """
     try:
-        page = get_page(page_id)
+        page = await get_page(page_id)
         
         if not page:
             raise HTTPException(
@@ -168,24 +297,21 @@ async def edit_section(page_id: str, request: EditSectionRequest):
                 detail=f"Page {page_id} not found"
             )
         
-        # Find and update section
+        # Find and update section; the index holds the same dicts as the list
         sections = page["sections"]
-        section_found = False
+        sections_by_id = {section["id"]: section for section in sections}
+        section = sections_by_id.get(request.section_id)
         
-        for section in sections:
-            if section["id"] == request.section_id:
-                section["data"] = request.data
-                section_found = True
-                break
-        
-        if not section_found:
+        if section is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Section {request.section_id} not found"
             )
         
+        section["data"] = request.data
+        
         # Update in database
-        updated_page = update_page(page_id, sections)
+        updated_page = await update_page(page_id, sections)
         
         return {
             "message": "Section updated successfully",
@@ -202,8 +328,47 @@ async def edit_section(page_id: str, request: EditSectionRequest):
         )
 
 
-@router.post("/pages/{page_id}/regenerate-section")
-async def regenerate_section_endpoint(page_id: str, request: EditSectionRequest):
+@router.post("/pages/{page_id}/sections/bulk", openapi_extra=_body_docs(BulkEditSectionsRequest))
+async def bulk_edit_sections(page_id: str, request: BulkEditSectionsRequest = Depends(_json_body(BulkEditSectionsRequest))):
+    """
+    Edit several sections of a page in a single database write
+    
+    Args:
+        page_id: The page ID
+        request: Section IDs with their updated data
+    
+    Returns:
+        dict: Updated page version
+    """
+    try:
+        # Later edits to the same section win
+        section_updates = {section.section_id: section.data for section in request.sections}
+        
+        updated_page = await bulk_update_sections(page_id, section_updates)
+        
+        if not updated_page:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Page {page_id} or one of its sections not found"
+            )
+        
+        return {
+            "message": "Sections updated successfully",
+            "page_id": page_id,
+            "version": updated_page["version"]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to edit sections: {str(e)}"
+        )
+
+
+@router.post("/pages/{page_id}/regenerate-section", openapi_extra=_body_docs(EditSectionRequest))
+async def regenerate_section_endpoint(page_id: str, request: EditSectionRequest = Depends(_json_body(EditSectionRequest))):
     """
     Regenerate a section using AI
     
@@ -215,7 +380,7 @@ async def regenerate_section_endpoint(page_id: str, request: EditSectionRequest)
         dict: Updated page with regenerated section
     """
     try:
-        page = get_page(page_id)
+        page = await get_page(page_id)
         
         if not page:
             raise HTTPException(
@@ -225,14 +390,10 @@ async def regenerate_section_endpoint(page_id: str, request: EditSectionRequest)
         
         # Find the section
         sections = page["sections"]
-        section_to_regenerate = None
+        sections_by_id = {section["id"]: section for section in sections}
+        section_to_regenerate = sections_by_id.get(request.section_id)
         
-        for section in sections:
-            if section["id"] == request.section_id:
-                section_to_regenerate = section
-                break
-        
-        if not section_to_regenerate:
+        if section_to_regenerate is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Section {request.section_id} not found"
@@ -240,16 +401,13 @@ async def regenerate_section_endpoint(page_id: str, request: EditSectionRequest)
         
         # Regenerate using LLM
         user_input = request.data.get("context", {})
-        regenerated = regenerate_section(section_to_regenerate, user_input)
+        regenerated = await regenerate_section(section_to_regenerate, user_input)
         
-        # Update section in page
-        for section in sections:
-            if section["id"] == request.section_id:
-                section["data"] = regenerated["data"]
-                break
+        # Update section in page (same object as in sections)
+        section_to_regenerate["data"] = regenerated["data"]
         
         # Save to database
-        updated_page = update_page(page_id, sections)
+        updated_page = await update_page(page_id, sections)
         
         return {
             "message": "Section regenerated successfully",
@@ -266,8 +424,8 @@ async def regenerate_section_endpoint(page_id: str, request: EditSectionRequest)
         )
 
 
-@router.post("/pages/{page_id}/reorder-sections")
-async def reorder_sections(page_id: str, request: ReorderSectionsRequest):
+@router.post("/pages/{page_id}/reorder-sections", openapi_extra=_body_docs(ReorderSectionsRequest))
+async def reorder_sections(page_id: str, request: ReorderSectionsRequest = Depends(_json_body(ReorderSectionsRequest))):
     """
     Reorder sections in a page
     
@@ -279,16 +437,27 @@ async def reorder_sections(page_id: str, request: ReorderSectionsRequest):
         dict: Updated page
     """
     try:
-        page = get_page(page_id)
+        section_ids = [section.get("id") for section in request.sections]
         
-        if not page:
+        if None in section_ids or len(set(section_ids)) != len(section_ids):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Page {page_id} not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Every section needs a unique id"
             )
         
-        # Update order
-        updated_page = update_page(page_id, request.sections)
+        # Only the id order is sent; MongoDB rearranges the stored sections
+        updated_page = await reorder_page(page_id, section_ids)
+        
+        if not updated_page:
+            if not await get_page(page_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Page {page_id} not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Sections do not match the page's sections"
+            )
         
         return {
             "message": "Sections reordered successfully",
@@ -305,7 +474,7 @@ async def reorder_sections(page_id: str, request: ReorderSectionsRequest):
         )
 
 
-@router.post("/pages/{page_id}/publish", response_model=PublishResponse)
+@router.post("/pages/{page_id}/publish", responses={200: {"model": PublishResponse}})
 async def publish_landing_page(page_id: str):
     """
     Publish a landing page
@@ -317,7 +486,7 @@ async def publish_landing_page(page_id: str):
         PublishResponse: Confirmation and preview URL
     """
     try:
-        page = get_page(page_id)
+        page = await get_page(page_id)
         
         if not page:
             raise HTTPException(
@@ -326,9 +495,10 @@ async def publish_landing_page(page_id: str):
             )
         
         # Publish
-        published_page = publish_page(page_id)
+        published_page = await publish_page(page_id)
         
-        return PublishResponse(
+        # Built from trusted values; model_construct skips the validator pass
+        return PublishResponse.model_construct(
             page_id=page_id,
             version=published_page["version"],
             url=f"/preview/{page_id}",
@@ -356,7 +526,7 @@ async def delete_landing_page(page_id: str):
         dict: Confirmation
     """
     try:
-        success = delete_page(page_id)
+        success = await delete_page(page_id)
         
         if not success:
             raise HTTPException(
@@ -1,11 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import app  # This imports app/__init__.py which loads .env
 from app.routes.pages import router as pages_router
-from app.db import init_db
+from app.responses import ORJSONResponse
+from app.db import ping_db, ensure_indexes
+from app.crawler import crawler
 import os
 
-app = FastAPI(title="AI Landing Page Builder")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Only the ping blocks startup; index creation runs in the background
+    await ping_db()
+    app.state.index_task = asyncio.create_task(ensure_indexes())
+    yield
+    await crawler.close()
+
+is_production = os.getenv("ENVIRONMENT") == "production"
+
+# No interactive docs or schema generation in production
+app = FastAPI(
+    title="AI Landing Page Builder",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+    openapi_url=None if is_production else "/openapi.json",
+    docs_url=None if is_production else "/docs",
+    redoc_url=None if is_production else "/redoc"
+)
 
 # CORS Configuration
 cors_origins = [
@@ -21,7 +43,7 @@ frontend_url = os.getenv("FRONTEND_URL")
 if frontend_url:
     cors_origins.append(frontend_url)
 
-if os.getenv("ENVIRONMENT") == "production":
+if is_production:
     cors_origins = [
         "https://ai-dlp-frontend.vercel.app",
     ]
@@ -30,15 +52,11 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists so preflight responses are not built by echoing request headers
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["content-type", "authorization"],
 )
 
-# Initialize DB
-@app.on_event("startup")
-async def startup_event():
-    init_db()
-
 # Include routes
 app.include_router(pages_router, prefix="/api", tags=["pages"])
 
@@ -47,5 +65,15 @@ async def health_check():
     return {"status": "ok"}
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    # Workers import "main:app" themselves, so each gets its own MongoDB pool and crawler session
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "4"))
+    )
\ No newline at end of file